@@ -0,0 +1,495 @@
+import os
+import logging
+import functools
+from pathlib import Path
+import pandas as pd
+import numpy as np
+import statsmodels.api as sm
+import yfinance as yf
+from numba import njit, prange
+
+DATA_FOLDER = "../data"
+
+# Cache hits are logged at DEBUG level, enable with logging.basicConfig(level=logging.DEBUG)
+log = logging.getLogger(__name__)
+
+# Cache downloads as Parquet (typed, compressed, no date parsing on load).
+# Set to False to fall back to the legacy CSV cache.
+USE_PARQUET = True
+
+def _load_cached(ticker):
+    """
+    Loads the saved data for a ticker.
+    Returns None if the ticker has not been downloaded yet.
+    """
+
+    file_path = os.path.join(DATA_FOLDER, f"{ticker}.csv")
+    parquet_path = file_path.replace(".csv", ".parquet")
+
+    # If Parquet already exists it will not be downloaded again
+    if USE_PARQUET and os.path.exists(parquet_path):
+        log.debug("[LOAD DATA] %s already saved. Loading from Parquet...", ticker)
+        df = pd.read_parquet(parquet_path, engine="pyarrow")
+
+    # Same for a legacy CSV
+    elif os.path.exists(file_path):
+        log.debug("[LOAD DATA] %s already saved. Loading from CSV...", ticker)
+        # header=2: the pyarrow engine applies skiprows after the header row
+        df = pd.read_csv(file_path, header=2, index_col="Date", engine="pyarrow")
+        # Same (Price, Ticker) column as the Parquet cache and a fresh download
+        df.columns = pd.MultiIndex.from_tuples([("Price", ticker)], names=["Price", "Ticker"])
+
+    else:
+        return None
+
+    # Both caches return the same index resolution
+    df.index = pd.to_datetime(df.index).astype("datetime64[ns]")
+    return df
+
+def _save_prices(ticker, df):
+    """
+    Keeps the price column of a yfinance DataFrame and saves it.
+    Returns the saved DataFrame.
+    """
+
+    file_path = os.path.join(DATA_FOLDER, f"{ticker}.csv")
+    parquet_path = file_path.replace(".csv", ".parquet")
+
+    df.index.name = "Date"
+
+    # Prefer Adj Close if available, else fall back to Close
+    if "Adj Close" in df.columns:
+        df = df[["Adj Close"]].rename(columns={"Adj Close": "Price"})
+    elif "Close" in df.columns:
+        df = df[["Close"]].rename(columns={"Close": "Price"})
+    else:
+        raise ValueError(f"No usable price column found for {ticker}")
+
+    # Same index resolution as a cache hit
+    df.index = pd.to_datetime(df.index).astype("datetime64[ns]")
+    df.index.name = "Date"
+
+    if USE_PARQUET:
+        df.to_parquet(parquet_path, engine="pyarrow", compression="zstd")
+        print(f"[SAVED DATA] {ticker}.parquet created.")
+    else:
+        df.to_csv(file_path)
+        print(f"[SAVED DATA] {ticker}.csv created.")
+
+    return df
+
+@functools.lru_cache(maxsize=256)
+def _download_or_load_cached(ticker, start, end):
+    """
+    Memoized body of download_or_load, keyed on (ticker, start, end).
+    """
+
+    df = _load_cached(ticker)
+    if df is not None:
+        return df
+
+    # Otherwise we download and save the data
+    print(f"[DOWNLOAD DATA] Getting data for {ticker}...")
+    df = yf.download(ticker, start=start, end=end)
+
+    return _save_prices(ticker, df)
+
+def download_or_load(ticker, start, end):
+    """
+    Downloads the data for a ticker only if not already saved.
+    Results are kept in memory for the session, so repeated calls skip the disk read.
+    Returns a copy of the loaded DataFrame.
+    """
+
+    return _download_or_load_cached(ticker, start, end).copy()
+
+def download_or_load_many(tickers, start, end):
+    """
+    Same as download_or_load for several tickers.
+    All tickers not already saved are fetched in a single threaded yfinance call.
+    Returns a dict {ticker: DataFrame}.
+    """
+
+    all_data = {ticker: _load_cached(ticker) for ticker in tickers}
+    missing = [ticker for ticker, df in all_data.items() if df is None]
+
+    if missing:
+        print(f"[DOWNLOAD DATA] Getting data for {', '.join(missing)}...")
+        raw = yf.download(missing, start=start, end=end, threads=True, group_by="ticker")
+
+        for ticker in missing:
+            # Same (Price, Ticker) column layout as a single-ticker download
+            df = raw.xs(ticker, axis=1, level=0, drop_level=False).swaplevel(axis=1)
+            all_data[ticker] = _save_prices(ticker, df)
+
+    return all_data
+
+def clear_all_csv():
+    """
+    Deletes ALL CSV (and Parquet cache) files inside /data folder.
+    Use to force re-download of data.
+    """
+
+    folder = Path(DATA_FOLDER)
+    files = [*folder.glob("*.csv"), *folder.glob("*.parquet")]
+    for file in files:
+        file.unlink()
+
+    _download_or_load_cached.cache_clear()
+    print(f"[DATA CLEARED] {len(files)} CSV/Parquet files deleted.")
+
+def max_drawdown(x, kind="cumreturns"):
+    """
+    Compute max drawdown.
+    x : cumulative returns / price series (kind="cumreturns")
+        or simple periodic returns (kind="returns")
+    """
+    arr = np.asarray(x, dtype=np.float64)
+    if kind == "cumreturns":
+        cum = arr
+    elif kind == "returns":
+        cum = np.cumprod(1.0 + arr)
+    else:
+        raise ValueError(f"Unknown kind {kind!r}, expected 'cumreturns' or 'returns'")
+
+    # Empty series: NaN like Series.min()
+    if cum.size == 0:
+        return np.nan
+
+    # fmax / nanmin skip gaps (NaN) like cummax() / min() do
+    peak = np.fmax.accumulate(cum)
+    return float(np.nanmin(cum / peak - 1.0))
+
+@njit(cache=True)
+def _moments(x):
+    """
+    Single-pass mean, sample std, skewness and excess kurtosis.
+    Uses online central moment updates; bias corrections match pandas.
+    """
+    n = 0
+    mean = 0.0
+    M2 = 0.0
+    M3 = 0.0
+    M4 = 0.0
+    for v in x:
+        n1 = n
+        n += 1
+        delta = v - mean
+        delta_n = delta / n
+        delta_n2 = delta_n * delta_n
+        term1 = delta * delta_n * n1
+        mean += delta_n
+        M4 += term1 * delta_n2 * (n * n - 3 * n + 3) + 6.0 * delta_n2 * M2 - 4.0 * delta_n * M3
+        M3 += term1 * delta_n * (n - 2) - 3.0 * delta_n * M2
+        M2 += term1
+
+    # Too few points or zero variance: NaN / 0 like pandas, instead of ZeroDivisionError
+    if n == 0:
+        mean = np.nan
+    std = np.sqrt(M2 / (n - 1)) if n >= 2 else np.nan
+
+    if n < 3:
+        skew = np.nan
+    elif M2 == 0.0:
+        skew = 0.0
+    else:
+        skew = n * np.sqrt(n - 1.0) / (n - 2.0) * M3 / M2 ** 1.5
+
+    if n < 4:
+        kurt = np.nan
+    elif M2 == 0.0:
+        kurt = 0.0
+    else:
+        kurt = (n * (n + 1.0) * (n - 1.0) * M4) / ((n - 2.0) * (n - 3.0) * M2 * M2) \
+            - 3.0 * (n - 1.0) ** 2 / ((n - 2.0) * (n - 3.0))
+    return mean, std, skew, kurt
+
+def performance_metrics(cumreturn_series, var_conf=0.95):
+    """
+    Compute metrics for one return series.
+    We use the folowing metrics to evaluate performance:
+    - Sharpe Ratio
+    - Max Drawdown
+    - Kurtosis
+    - Skewness
+    - Annualized Volatility
+    """
+    # Daily returns from cumulative return series
+    cum = np.asarray(cumreturn_series, dtype=np.float64)
+    daily_returns = cum[1:] / cum[:-1] - 1.0
+    # Drop ratios touching a gap, like pct_change().dropna()
+    daily_returns = daily_returns[~np.isnan(daily_returns)]
+    ann_factor = np.sqrt(252)
+
+    mean, std, skew, kurt = _moments(daily_returns)
+    sharpe = (np.float64(mean) / std) * ann_factor
+    vol = std * np.sqrt(252)
+    mdd = max_drawdown(cum)
+
+    # Historical Value at Risk: k smallest returns via partial sort
+    var_level = 1 - var_conf
+    if len(daily_returns) == 0:
+        # No usable daily returns: NaN like the pandas quantile / mean
+        var = cvar = np.nan
+    else:
+        k = max(1, int(np.ceil(len(daily_returns) * var_level)))
+        tail = np.partition(daily_returns, k - 1)[:k]
+        var = tail.max()
+
+        # Conditional VaR (Expected Shortfall)
+        cvar = tail.mean()
+
+    return pd.Series({
+        "Sharpe Ratio": sharpe,
+        "Max Drawdown": mdd,
+        "Kurtosis": kurt,
+        "Skewness": skew,
+        "Annualized Volatility": vol,
+        f"VaR {int(var_conf*100)}%": var,
+        f"CVaR {int(var_conf*100)}%": cvar
+    })
+
+def rebalance_mask(returns, rebalance_freq):
+    """
+    Boolean array aligned with returns.index, True on scheduled rebalance dates.
+    Scheduled dates are the period labels of returns.resample(rebalance_freq)
+    (e.g. month ends for 'ME', Sundays for 'W'); a day rebalances only if it falls on one.
+    Accepts any offset alias resample does ('D', 'W', 'ME', 'MS', 'BME', ...).
+    """
+    index = returns.index
+    if len(index) == 0:
+        return np.zeros(0, dtype=np.bool_)
+
+    # The on-offset dates spanning the index are exactly the resample labels
+    labels = pd.date_range(index[0].normalize(), index[-1], freq=rebalance_freq)
+    return index.isin(labels)
+
+@njit(cache=True, inline="always")
+def _target_weight(portfolio_value, floor, m):
+    """
+    CPPI risky weight m * cushion, clipped to [0, 1] with plain comparisons.
+    """
+    cushion = portfolio_value - floor
+    if cushion < 0.0:
+        cushion = 0.0
+    w = m * cushion / portfolio_value
+    if w > 1.0:
+        w = 1.0
+    return w
+
+@njit(cache=True)
+def _cppi_fill(spy, shy, reb, floor, m, cppi_vals, weights):
+    """
+    CPPI recurrence on raw arrays, written into preallocated output arrays.
+    """
+    portfolio_value = 1.0
+    w = 0.0  # initial risky weight
+
+    for i in range(len(spy)):
+        if reb[i]:
+            w = _target_weight(portfolio_value, floor, m)
+
+        portfolio_value *= 1.0 + w * spy[i] + (1.0 - w) * shy[i]
+        cppi_vals[i] = portfolio_value
+        weights[i] = w
+
+@njit(cache=True)
+def _cppi_kernel(spy, shy, reb, floor, m):
+    """
+    CPPI recurrence on raw arrays. Returns portfolio values and risky weights.
+    """
+    n = len(spy)
+    cppi_vals = np.empty(n)
+    weights = np.empty(n)
+    _cppi_fill(spy, shy, reb, floor, m, cppi_vals, weights)
+    return cppi_vals, weights
+
+@njit(cache=True, parallel=True)
+def _cppi_grid_kernel(spy, shy, reb_masks, floors, ms):
+    """
+    Runs every ((floor, m) pair, rebalance) combination in parallel over the same returns.
+    floors and ms are paired element-wise.
+    Row k of the outputs is pair k // n_freq, mask k % n_freq.
+    """
+    n = len(spy)
+    n_freq = reb_masks.shape[0]
+    n_configs = len(floors) * n_freq
+
+    out_values = np.empty((n_configs, n))
+    out_weights = np.empty((n_configs, n))
+
+    for k in prange(n_configs):
+        j = k % n_freq
+        a = k // n_freq
+        _cppi_fill(spy, shy, reb_masks[j], floors[a], ms[a], out_values[k], out_weights[k])
+
+    return out_values, out_weights
+
+# CPPI simulation function with params
+def run_cppi(returns, floor=0.8, m=3, rebalance_freq='W'):
+    spy = returns["SPY"].to_numpy(dtype=np.float64)
+    shy = returns["SHY"].to_numpy(dtype=np.float64)
+    reb = rebalance_mask(returns, rebalance_freq)
+
+    cppi_vals, weight_risky = _cppi_kernel(spy, shy, reb, float(floor), float(m))
+
+    strategy_cum = pd.Series(cppi_vals, index=returns.index)
+    return strategy_cum, weight_risky
+
+def run_cppi_grid(returns, floors, multipliers, rebalance_freqs=('D', 'W', 'ME'), combinations=None):
+    """
+    Run run_cppi for every (floor, m, rebalance_freq) combination in one parallel kernel.
+
+    Parameters:
+        returns : pd.DataFrame with columns ["SPY", "SHY"]
+        floors : iterable of floors
+        multipliers : iterable of CPPI multipliers
+        rebalance_freqs : iterable of rebalance frequencies ('D', 'W', 'ME')
+        combinations : optional list of (floor, m) pairs to run instead of
+                       every floor x multiplier pair (e.g. only the safe ones)
+
+    Returns:
+        configs : pd.DataFrame with columns floor, m, rebalance (one row per config)
+        values : np.ndarray (n_configs, n_days) of portfolio values
+        weights : np.ndarray (n_configs, n_days) of risky allocations
+    """
+    if combinations is None:
+        combinations = [(floor, m) for floor in floors for m in multipliers]
+    pairs = np.asarray(combinations, dtype=np.float64).reshape(-1, 2)
+    floors = np.ascontiguousarray(pairs[:, 0])
+    ms = np.ascontiguousarray(pairs[:, 1])
+    rebalance_freqs = list(rebalance_freqs)
+
+    # float32 returns halve memory traffic in the kernel, portfolio value stays float64
+    spy = np.ascontiguousarray(returns["SPY"].to_numpy(dtype=np.float32))
+    shy = np.ascontiguousarray(returns["SHY"].to_numpy(dtype=np.float32))
+    reb_masks = np.stack([rebalance_mask(returns, freq) for freq in rebalance_freqs])
+
+    values, weights = _cppi_grid_kernel(spy, shy, reb_masks, floors, ms)
+
+    configs = pd.DataFrame(
+        [(floor, m, freq) for floor, m in zip(floors, ms) for freq in rebalance_freqs],
+        columns=["floor", "m", "rebalance"]
+    )
+    return configs, values, weights
+
+# Colors for floors
+floor_colors = {
+    0.5: "blue",
+    0.55: "cyan",
+    0.6: "green",
+    0.65: "lime",
+    0.7: "yellowgreen",
+    0.75: "gold",
+    0.8: "orange",
+    0.85: "darkorange",
+    0.9: "red",
+    0.95: "darkred"
+}
+
+# Line styles for multipliers
+multiplier_styles = {
+    2: "-",
+    2.5: "--",
+    3: "-.",
+    3.5: ":",
+    4: (0, (3, 1, 1, 1)),  
+    4.5: (0, (5, 5)),      
+    5: (0, (1, 1))          
+}
+
+# alpha values for rebalance frequencies
+rebalance_alpha = {
+    'D': 1.0,
+    'W': 0.7,
+    'ME': 0.4
+}
+
+def check_frozen(strategy_weights, threshold=0.5):
+    """
+    Check if CPPI strategy is frozen (risky allocation mostly 0)
+    
+    strategy_weights : pd.Series or list of risky weights
+    threshold : fraction of time risky weight = 0 to be considered frozen
+    """
+    w_array = pd.Series(strategy_weights)
+    frozen_fraction = (w_array == 0).mean()
+    return frozen_fraction >= threshold, frozen_fraction
+
+def check_frozen_batch(weights, threshold=0.5):
+    """
+    Vectorized check_frozen over a (n_configs, n_days) weight matrix,
+    e.g. the weights returned by run_cppi_grid.
+
+    Returns boolean array of frozen configs and array of frozen fractions.
+    """
+    frozen_fraction = (np.asarray(weights) == 0.0).mean(axis=1)
+    return frozen_fraction >= threshold, frozen_fraction
+
+@njit(cache=True)
+def _cppi_dyn_kernel(spy, shy, reb_mask, floor0, m):
+    """
+    Dynamic floor CPPI recurrence on raw arrays. Returns portfolio values and risky weights.
+    """
+    n = len(spy)
+    values = np.empty(n, dtype=np.float64)
+    weights = np.empty(n, dtype=np.float64)
+
+    portfolio_value = 1.0
+
+    # Initialize dynamic floor
+    dynamic_floor = floor0
+
+    w = 0.0
+
+    for i in range(n):
+        # At rebalance:
+        if reb_mask[i]:
+            w = _target_weight(portfolio_value, dynamic_floor, m)
+
+        # If full allocation reached, update floor accordingly
+        if w == 1.0:
+            dynamic_floor = floor0 * portfolio_value
+
+        # Calculate portfolio return with current weight allocation
+        portfolio_value *= 1.0 + w * spy[i] + (1.0 - w) * shy[i]
+
+        values[i] = portfolio_value
+        weights[i] = w
+
+    return values, weights
+
+def run_cppi_dynamic_floor(returns, floor=0.8, m=3, rebalance_freq='ME'):
+    """
+    CPPI with dynamic floor:
+    - Once risky allocation hits 100%, the floor is updated to the current portfolio value.
+    - On next rebalance, the weight is recalculated based on new floor.
+    - This prevents the strategy from staying at 100% SPY forever.
+    
+    Parameters:
+        returns : pd.DataFrame with columns ["SPY", "SHY"]
+        floor : initial floor as fraction of initial portfolio
+        m : CPPI multiplier
+        rebalance_freq : 'D', 'W', 'ME'
+    
+    Returns:
+        portfolio_cum : pd.Series of portfolio value
+        weights : np.ndarray of risky allocations
+    """
+    spy_arr = returns["SPY"].to_numpy(dtype=np.float64)
+    shy_arr = returns["SHY"].to_numpy(dtype=np.float64)
+
+    # Scheduled rebalance dates
+    reb_mask = rebalance_mask(returns, rebalance_freq)
+
+    values, weights = _cppi_dyn_kernel(spy_arr, shy_arr, reb_mask, float(floor), float(m))
+
+    return pd.Series(values, index=returns.index), weights
+
+# Sharpe ratio (annualized)
+def annualized_sharpe(returns, risk_free=0.0, trading_days=252):
+    excess_returns = returns - risk_free
+    return (excess_returns.mean() / excess_returns.std()) * np.sqrt(trading_days)
+
+def annualized_volatility(returns, trading_days=252):
+    return returns.std() * np.sqrt(trading_days)
\ No newline at end of file